@@ -4,11 +4,11 @@ Stylize topographic maps with hypsometric tinting
 """
 
 import os
-import base64
 from pathlib import Path
 from io import BytesIO
 from PIL import Image
 from dotenv import load_dotenv
+from pybase64 import b64encode_as_string
 
 # Load environment variables
 load_dotenv()
@@ -93,7 +93,7 @@ def stylize_texture(image_path: str) -> str:
             img.save(buffer, format="JPEG", quality=85, optimize=True)
             mime = "image/jpeg"
 
-        image_data = base64.b64encode(buffer.getvalue()).decode("utf-8")
+        image_data = b64encode_as_string(buffer.getvalue())
 
     except Exception as e:
         raise ValueError(f"Failed to process image: {str(e)}")
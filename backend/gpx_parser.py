@@ -2,91 +2,303 @@
 GPX Parser - Extract track coordinates from GPX files
 """
 
+import asyncio
+import hashlib
+import threading
 import xml.etree.ElementTree as ET
-from typing import List, Dict, Any
+from array import array
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
 
+import numpy as np
 
-def parse_gpx(file_path: str, simplify_factor: int = 10) -> Dict[str, Any]:
+# Clark-notation ("{namespace}tag") names, built once so the parse loop
+# compares tags with set lookups instead of XPath/namespace resolution
+_GPX_NAMESPACES = ('http://www.topografix.com/GPX/1/1', 'http://www.topografix.com/GPX/1/0')
+_TRK_TAGS = frozenset(f'{{{ns}}}trk' for ns in _GPX_NAMESPACES)
+_TRKSEG_TAGS = frozenset(f'{{{ns}}}trkseg' for ns in _GPX_NAMESPACES)
+_TRKPT_TAGS = frozenset(f'{{{ns}}}trkpt' for ns in _GPX_NAMESPACES)
+_NAME_TAGS = frozenset(f'{{{ns}}}name' for ns in _GPX_NAMESPACES)
+# Direct children of <gpx> whose subtrees are dropped once read
+_TOP_LEVEL_TAGS = frozenset(
+    f'{{{ns}}}{name}' for ns in _GPX_NAMESPACES for name in ('trk', 'rte', 'wpt')
+)
+_ELE_TAG_FOR_TRKPT = {f'{{{ns}}}trkpt': f'{{{ns}}}ele' for ns in _GPX_NAMESPACES}
+
+# RDP tolerance as a fraction of the track's bounding-box diagonal
+# (roughly one texel of the 2048px map texture across the track's extent)
+_RDP_TOLERANCE_RATIO = 5e-4
+# Tolerance floor in degrees (~11 m, a few sigma of consumer GPS noise), so
+# jitter on small tracks is not treated as detail worth keeping
+_RDP_MIN_TOLERANCE = 1e-4
+# Longest allowed gap between kept points, in multiples of the spacing the
+# stride budget would give. The frontend drapes the track over the terrain
+# only at its vertices, so much longer chords cut through ridges
+_RDP_GAP_SPACING = 4
+
+# Parsed summaries keyed by (file digest, simplify_factor, method). Uploads
+# are saved under fresh names, so the key is the file's content, not its path.
+# Locked because parse_gpx_async runs parses in worker threads
+_SUMMARY_CACHE_SIZE = 8
+_summary_cache: OrderedDict = OrderedDict()
+_summary_cache_lock = threading.Lock()
+
+
+def _collect_track(file_path: str) -> Tuple[str, np.ndarray]:
+    """
+    Stream a GPX file and collect its track points.
+    
+    Returns:
+        (track_name, points) where points is an (N, 3) float64 array of
+        lat, lon, ele rows
+    """
+    # Stream the file, detaching each element once it has been read so
+    # memory stays flat regardless of track length (clear() alone would
+    # leave an empty shell per point attached to its parent)
+    track_name = None
+    coords = array('d')  # Interleaved lat, lon, ele
+    root = None
+    segment = None
+    
+    for event, elem in ET.iterparse(file_path, events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            if root is None:
+                root = elem
+            elif tag in _TRKSEG_TAGS:
+                segment = elem
+            continue
+        
+        if tag in _TRKPT_TAGS:
+            ele = elem.findtext(_ELE_TAG_FOR_TRKPT[tag])
+            coords.append(float(elem.get('lat')))
+            coords.append(float(elem.get('lon')))
+            coords.append(float(ele) if ele is not None else 0)
+            if segment is not None:
+                del segment[:]
+            else:
+                elem.clear()
+        elif tag in _TRKSEG_TAGS:
+            segment = None
+        elif tag in _TRK_TAGS and track_name is None:
+            for child in elem:
+                if child.tag in _NAME_TAGS:
+                    track_name = child.text
+                    break
+        
+        if tag in _TOP_LEVEL_TAGS and root is not None:
+            # Everything before this point in <gpx> has been fully read
+            del root[:]
+    
+    if track_name is None:
+        track_name = "Unknown Track"
+    
+    return track_name, np.frombuffer(coords).reshape(-1, 3)
+
+
+def rdp(
+    points: np.ndarray,
+    epsilon: float,
+    max_gap: Optional[float] = None,
+    max_points: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Ramer-Douglas-Peucker polyline simplification.
+    
+    Args:
+        points: (N, 2) array of planar coordinates
+        epsilon: Maximum allowed distance between the original and
+            simplified line, in the same units as points
+        max_gap: If set, spans whose chord is longer than this are split
+            at their middle point even when they are within epsilon
+        max_points: If set, give up as soon as more than this many points
+            are kept; the incomplete result then has max_points + 1 entries
+    
+    Returns:
+        Sorted indices of the points to keep (always includes both ends)
+    """
+    n = len(points)
+    if n < 3:
+        return np.arange(n)
+    
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    kept = 2
+    
+    # Iterative to avoid recursion limits; each span's distances are vectorized
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        
+        origin = points[start]
+        dx, dy = points[end] - origin
+        rel = points[start + 1:end] - origin
+        length = np.hypot(dx, dy)
+        if length > 0:
+            dist = np.abs(dx * rel[:, 1] - dy * rel[:, 0]) / length
+        else:
+            dist = np.hypot(rel[:, 0], rel[:, 1])
+        
+        i = int(dist.argmax())
+        if dist[i] > epsilon:
+            split = start + 1 + i
+        elif max_gap is not None and length > max_gap:
+            split = (start + end) // 2
+        else:
+            continue
+        
+        keep[split] = True
+        kept += 1
+        if max_points is not None and kept > max_points:
+            break
+        stack.append((start, split))
+        stack.append((split, end))
+    
+    return np.flatnonzero(keep)
+
+
+def _stride_indices(total_points: int, simplify_factor: int) -> np.ndarray:
+    """
+    Indices of every Nth point, always including the last one.
+    """
+    # Sized up front rather than grown with np.append
+    n_strided = (total_points + simplify_factor - 1) // simplify_factor
+    include_last = total_points > 0 and (total_points - 1) % simplify_factor != 0
+    idx = np.empty(n_strided + include_last, dtype=np.intp)
+    idx[:n_strided] = np.arange(0, total_points, simplify_factor)
+    if include_last:
+        idx[-1] = total_points - 1
+    return idx
+
+
+def _file_digest(file_path: str) -> bytes:
+    with open(file_path, 'rb') as f:
+        return hashlib.file_digest(f, 'blake2b').digest()
+
+
+def _summarize_track(
+    file_path: str, simplify_factor: int, method: str
+) -> Tuple[str, np.ndarray, Optional[np.ndarray], int]:
+    """
+    Parse and simplify a GPX file.
+    
+    Returns:
+        (track_name, simplified, extremes, total_points) where simplified is
+        a read-only (M, 3) lat/lon/ele array and extremes is a read-only
+        (2, 3) array of column minima and maxima (None for an empty track)
+    """
+    if method not in ("rdp", "stride"):
+        raise ValueError(f"Unknown simplification method: {method}")
+    
+    track_name, points = _collect_track(file_path)
+    total_points = len(points)
+    
+    # Bounds and elevation range, reduced column by column (an axis=0
+    # reduction over a narrow (N, 3) array is several times slower)
+    extremes = None
+    if total_points:
+        columns = points.T
+        extremes = np.array([[col.min() for col in columns], [col.max() for col in columns]])
+        extremes.flags.writeable = False
+    
+    idx = _stride_indices(total_points, simplify_factor)
+    
+    # The stride point count is the budget; RDP is used only when it fits
+    # (with just the two ends there is nothing left for it to choose)
+    budget = len(idx)
+    if method == "rdp" and budget > 2:
+        # Simplify in lat/lon, with longitude scaled so both axes are ~equal distance
+        (south, west, _), (north, east, _) = extremes
+        lon_scale = np.cos(np.radians((north + south) / 2))
+        planar = np.column_stack([points[:, 0], points[:, 1] * lon_scale])
+        diagonal = np.hypot(north - south, (east - west) * lon_scale)
+        epsilon = max(diagonal * _RDP_TOLERANCE_RATIO, _RDP_MIN_TOLERANCE)
+        
+        # Gap cap from the budget: the strided line's length is a noise-robust
+        # estimate of the track's, so gap splits alone need at most about
+        # budget / _RDP_GAP_SPACING points and always fit
+        strided_length = np.hypot(*np.diff(planar[idx], axis=0).T).sum()
+        max_gap = strided_length / (budget - 1) * _RDP_GAP_SPACING
+        
+        # Stops early on tracks too noisy to fit, which are strided instead
+        rdp_idx = rdp(planar, epsilon, max_gap=max_gap or None, max_points=budget)
+        if len(rdp_idx) <= budget:
+            idx = rdp_idx
+    
+    simplified = points[idx]
+    simplified.flags.writeable = False
+    
+    return track_name, simplified, extremes, total_points
+
+
+def parse_gpx(file_path: str, simplify_factor: int = 10, method: str = "rdp") -> Dict[str, Any]:
     """
     Parse a GPX file and extract track points.
     
+    The last few results are cached by file content, so only a repeat
+    parse of identical bytes (e.g. the same file uploaded again) is served
+    from the cache; the file is still read once to hash it.
+    
     Args:
         file_path: Path to the GPX file
-        simplify_factor: Keep every Nth point to reduce data (default: 10)
+        simplify_factor: Keep every Nth point when method is "stride"; with
+            "rdp" it caps the result at that many points (default: 10)
+        method: "rdp" (Ramer-Douglas-Peucker, tolerance scaled to the track's
+            extent, falling back to stride if it would keep more points)
+            or "stride" (every Nth point)
     
     Returns:
         {
             "name": "Track name",
-            "points": [{"lat": ..., "lon": ..., "ele": ...}, ...],
+            "lats": [...],  # Simplified track, one list per axis
+            "lons": [...],
+            "eles": [...],
             "bounds": {"north": ..., "south": ..., "east": ..., "west": ...},
             "elevation_range": {"min": ..., "max": ...},
             "total_points": ...
         }
     """
-    tree = ET.parse(file_path)
-    root = tree.getroot()
-    
-    # Handle GPX namespace
-    ns = {'gpx': 'http://www.topografix.com/GPX/1/1'}
-    
-    # Find track name
-    name_elem = root.find('.//gpx:trk/gpx:name', ns)
-    track_name = name_elem.text if name_elem is not None else "Unknown Track"
-    
-    # Extract all track points
-    points = []
-    all_lats = []
-    all_lons = []
-    all_eles = []
-    
-    for trkpt in root.findall('.//gpx:trkpt', ns):
-        lat = float(trkpt.get('lat'))
-        lon = float(trkpt.get('lon'))
-        ele_elem = trkpt.find('gpx:ele', ns)
-        ele = float(ele_elem.text) if ele_elem is not None else 0
-        
-        all_lats.append(lat)
-        all_lons.append(lon)
-        all_eles.append(ele)
-    
-    # Simplify by taking every Nth point
-    total_points = len(all_lats)
-    for i in range(0, total_points, simplify_factor):
-        points.append({
-            "lat": all_lats[i],
-            "lon": all_lons[i],
-            "ele": all_eles[i]
-        })
-    
-    # Always include the last point
-    if total_points > 0 and (total_points - 1) % simplify_factor != 0:
-        points.append({
-            "lat": all_lats[-1],
-            "lon": all_lons[-1],
-            "ele": all_eles[-1]
-        })
-    
-    # Calculate bounds and elevation range
-    if all_lats:
-        bounds = {
-            "north": max(all_lats),
-            "south": min(all_lats),
-            "east": max(all_lons),
-            "west": min(all_lons)
-        }
-        elevation_range = {
-            "min": min(all_eles),
-            "max": max(all_eles)
-        }
+    key = (_file_digest(file_path), simplify_factor, method)
+    with _summary_cache_lock:
+        summary = _summary_cache.get(key)
+        if summary is not None:
+            _summary_cache.move_to_end(key)
+    
+    if summary is None:
+        summary = _summarize_track(file_path, simplify_factor, method)
+        with _summary_cache_lock:
+            _summary_cache[key] = summary
+            while len(_summary_cache) > _SUMMARY_CACHE_SIZE:
+                _summary_cache.popitem(last=False)
+    
+    track_name, simplified, extremes, total_points = summary
+    
+    if extremes is not None:
+        (south, west, ele_min), (north, east, ele_max) = extremes.tolist()
+        bounds = {"north": north, "south": south, "east": east, "west": west}
+        elevation_range = {"min": ele_min, "max": ele_max}
     else:
         bounds = {"north": 0, "south": 0, "east": 0, "west": 0}
         elevation_range = {"min": 0, "max": 0}
     
+    lats, lons, eles = simplified.T.tolist()
+    
     return {
         "name": track_name,
-        "points": points,
+        "lats": lats,
+        "lons": lons,
+        "eles": eles,
         "bounds": bounds,
         "elevation_range": elevation_range,
         "total_points": total_points,
-        "simplified_points": len(points)
+        "simplified_points": len(simplified)
     }
+
+
+async def parse_gpx_async(file_path: str, simplify_factor: int = 10, method: str = "rdp") -> Dict[str, Any]:
+    """
+    Run parse_gpx in a worker thread so it doesn't block the event loop.
+    """
+    return await asyncio.to_thread(parse_gpx, file_path, simplify_factor, method)
@@ -10,12 +10,21 @@ from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, JSONResponse
 from dotenv import load_dotenv
+import orjson
 
 from . import terrain
 from . import gemini_client
 from . import fal_stylize
 from . import gpx_parser
 
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
 # Load environment variables
 load_dotenv()
 
@@ -61,8 +70,8 @@ async def upload_map(file: UploadFile = File(...)):
     try:
         if ext in {".tif", ".tiff"}:
             # GeoTIFF - extract bounds and texture
-            data = terrain.extract_geotiff_data(str(save_path))
-            return JSONResponse({
+            data = await terrain.extract_geotiff_data_async(str(save_path))
+            return FastJSONResponse({
                 "success": True,
                 "file_id": file_id,
                 "bounds": data["bounds"],
@@ -73,8 +82,8 @@ async def upload_map(file: UploadFile = File(...)):
             })
         else:
             # Regular image - just extract texture
-            data = terrain.extract_from_image(str(save_path))
-            return JSONResponse({
+            data = await terrain.extract_from_image_async(str(save_path))
+            return FastJSONResponse({
                 "success": True,
                 "file_id": file_id,
                 "texture_b64": data["texture_b64"],
@@ -105,12 +114,14 @@ async def upload_gpx(file: UploadFile = File(...)):
     
     try:
         # Parse GPX and extract track points
-        data = gpx_parser.parse_gpx(str(save_path), simplify_factor=20)
-        return JSONResponse({
+        data = await gpx_parser.parse_gpx_async(str(save_path), simplify_factor=20)
+        return FastJSONResponse({
             "success": True,
             "file_id": file_id,
             "name": data["name"],
-            "points": data["points"],
+            "lats": data["lats"],
+            "lons": data["lons"],
+            "eles": data["eles"],
             "bounds": data["bounds"],
             "elevation_range": data["elevation_range"],
             "total_points": data["total_points"],
@@ -134,7 +145,7 @@ async def extract_bounds(file_id: str):
     
     try:
         bounds = await gemini_client.extract_bounds_from_image(str(file_path))
-        return JSONResponse({
+        return FastJSONResponse({
             "success": True,
             "bounds": bounds
         })
@@ -149,7 +160,7 @@ async def narrate(location_info: dict, features: list[str] = []):
     """
     try:
         narration = await gemini_client.generate_narration(location_info, features)
-        return JSONResponse({
+        return FastJSONResponse({
             "success": True,
             "narration": narration
         })
@@ -171,7 +182,7 @@ async def stylize(file_id: str):
 
     try:
         stylized_url = fal_stylize.stylize_texture(str(file_path))
-        return JSONResponse({
+        return FastJSONResponse({
             "success": True,
             "stylized_url": stylized_url
         })
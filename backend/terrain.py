@@ -3,14 +3,16 @@ Terrain processing - GeoTIFF extraction and heightmap generation
 """
 
 import io
-import base64
+import asyncio
 import numpy as np
 from PIL import Image, ImageFilter
 from pathlib import Path
+from pybase64 import b64encode_as_string
 
 # Try rasterio, fall back gracefully
 try:
     import rasterio
+    from rasterio.enums import Resampling
     from rasterio.warp import transform_bounds
     HAS_RASTERIO = True
 except ImportError:
@@ -45,48 +47,56 @@ def extract_geotiff_data(file_path: str) -> dict:
             "north": wgs84_bounds[3]
         }
         
-        # Read image data
-        data = src.read()  # Shape: (bands, height, width)
+        original_width, original_height = src.width, src.height
+        
+        # Read only the bands we use, at web size (max 2048 on longest side).
+        # GDAL resamples during the read (from overviews when the file has them),
+        # so large rasters are never decoded at full resolution.
+        indexes = [1, 2, 3] if src.count >= 3 else [1]
+        max_dim = 2048
+        if src.width > max_dim or src.height > max_dim:
+            ratio = min(max_dim / src.width, max_dim / src.height)
+            out_shape = (len(indexes), int(src.height * ratio), int(src.width * ratio))
+            data = src.read(indexes, out_shape=out_shape, resampling=Resampling.bilinear)
+        else:
+            data = src.read(indexes)  # Shape: (bands, height, width)
         
         # Convert to RGB or normalize single band
         if data.shape[0] >= 3:
             # Traditional 3-band (RGB) GeoTIFF
-            rgb = np.stack([data[0], data[1], data[2]], axis=-1)
+            pixels = np.ascontiguousarray(data.transpose(1, 2, 0))
             # Ensure 8-bit
-            if rgb.dtype != np.uint8:
-                rgb = ((rgb - rgb.min()) / (rgb.max() - rgb.min()) * 255).astype(np.uint8)
+            if pixels.dtype != np.uint8:
+                pixels = ((pixels - pixels.min()) / (pixels.max() - pixels.min()) * 255).astype(np.uint8)
         else:
             # Single-band (DEM/Grayscale) - Perform min-max normalization (Whitescaling)
-            band = data[0].astype(float)
-            valid_mask = band != src.nodata if src.nodata is not None else np.ones_like(band, dtype=bool)
+            # Work in a single float32 buffer, with nodata as NaN so the
+            # reductions skip it without gathering the valid pixels first
+            normalized = data[0].astype(np.float32)
+            if src.nodata is not None:
+                normalized[normalized == src.nodata] = np.nan
             
-            b_min = band[valid_mask].min() if np.any(valid_mask) else 0
-            b_max = band[valid_mask].max() if np.any(valid_mask) else 1
+            b_min = float(np.nanmin(normalized, initial=np.inf))
+            b_max = float(np.nanmax(normalized, initial=-np.inf))
             
             if b_max > b_min:
-                normalized = (band - b_min) / (b_max - b_min) * 255
+                normalized -= b_min
+                normalized *= 255 / (b_max - b_min)
+                np.nan_to_num(normalized, copy=False, nan=0)
+                np.clip(normalized, 0, 255, out=normalized)
             else:
-                normalized = np.zeros_like(band)
+                normalized.fill(0)
                 
-            normalized = np.clip(normalized, 0, 255).astype(np.uint8)
-            rgb = np.stack([normalized, normalized, normalized], axis=-1)
+            # Keep it single-channel; browsers decode grayscale JPEGs as RGB anyway
+            pixels = normalized.astype(np.uint8)
         
-        # Create PIL image
-        img = Image.fromarray(rgb)
-        original_width, original_height = img.size
-        
-        # Resize for web (max 2048 on longest side)
-        max_dim = 2048
-        if img.width > max_dim or img.height > max_dim:
-            ratio = min(max_dim / img.width, max_dim / img.height)
-            new_size = (int(img.width * ratio), int(img.height * ratio))
-            img = img.resize(new_size, Image.LANCZOS)
+        # Create PIL image (RGB or grayscale)
+        img = Image.fromarray(pixels)
         
         # Encode as base64 JPEG
         buffer = io.BytesIO()
         img.save(buffer, 'JPEG', quality=85)
-        buffer.seek(0)
-        texture_b64 = base64.b64encode(buffer.read()).decode('utf-8')
+        texture_b64 = b64encode_as_string(buffer.getvalue())
         
         return {
             "bounds": bounds,
@@ -111,25 +121,29 @@ def extract_from_image(file_path: str) -> dict:
         }
     """
     img = Image.open(file_path)
-    
-    # Convert to RGB if necessary
-    if img.mode != 'RGB':
-        img = img.convert('RGB')
-    
     original_width, original_height = img.size
     
-    # Resize for web
+    # Work out the web size up front (max 2048 on longest side)
     max_dim = 2048
+    new_size = None
     if img.width > max_dim or img.height > max_dim:
         ratio = min(max_dim / img.width, max_dim / img.height)
         new_size = (int(img.width * ratio), int(img.height * ratio))
+        # JPEGs: let libjpeg decode at a reduced DCT scale (no-op for other formats)
+        img.draft('RGB', new_size)
+    
+    # Convert to RGB if necessary
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    
+    # Resize for web
+    if new_size is not None and img.size != new_size:
         img = img.resize(new_size, Image.LANCZOS)
     
     # Encode as base64 JPEG
     buffer = io.BytesIO()
     img.save(buffer, 'JPEG', quality=85)
-    buffer.seek(0)
-    texture_b64 = base64.b64encode(buffer.read()).decode('utf-8')
+    texture_b64 = b64encode_as_string(buffer.getvalue())
     
     return {
         "texture_b64": texture_b64,
@@ -140,12 +154,32 @@ def extract_from_image(file_path: str) -> dict:
     }
 
 
+async def extract_geotiff_data_async(file_path: str) -> dict:
+    """
+    Run extract_geotiff_data in a worker thread so it doesn't block the event loop.
+    """
+    return await asyncio.to_thread(extract_geotiff_data, file_path)
+
+
+async def extract_from_image_async(file_path: str) -> dict:
+    """
+    Run extract_from_image in a worker thread so it doesn't block the event loop.
+    """
+    return await asyncio.to_thread(extract_from_image, file_path)
+
+
 def process_heightmap(file_path: str, target_size: int = 512) -> str:
     """
     Process a heightmap image (e.g., from Gemini) for use in Three.js.
     Returns base64 PNG.
     """
-    img = Image.open(file_path).convert('L')  # Grayscale
+    img = Image.open(file_path)
+    
+    # JPEGs: have libjpeg decode straight to grayscale at the smallest DCT
+    # scale that still covers target_size (no-op for other formats)
+    img.draft('L', (target_size, target_size))
+    if img.mode != 'L':
+        img = img.convert('L')  # Grayscale
     
     # Apply slight blur to smooth
     img = img.filter(ImageFilter.GaussianBlur(radius=1))
@@ -160,9 +194,9 @@ def process_heightmap(file_path: str, target_size: int = 512) -> str:
     # Resize to target
     final = square.resize((target_size, target_size), Image.LANCZOS)
     
-    # Encode as base64 PNG
+    # Encode as base64 PNG (lowest zlib level: much faster, still lossless)
     buffer = io.BytesIO()
-    final.save(buffer, 'PNG')
-    buffer.seek(0)
+    final.save(buffer, 'PNG', compress_level=1)
     
-    return base64.b64encode(buffer.read()).decode('utf-8')
+    return b64encode_as_string(buffer.getvalue())
+
@@ -1049,7 +1049,7 @@ function renderGPXTrack() {
         state.gpxTrack.material.dispose();
     }
 
-    const points = state.gpxData.points;
+    const { lats, lons } = state.gpxData;
     const terrainParams = state.terrain.geometry.parameters;
     const terrainWidth = terrainParams.width;
     const terrainHeight = terrainParams.height;
@@ -1058,10 +1058,10 @@ function renderGPXTrack() {
     // Convert lat/lon to terrain coordinates
     const vertices = [];
 
-    for (const pt of points) {
+    for (let i = 0; i < lats.length; i++) {
         // Normalize to 0-1
-        const u = (pt.lon - west) / (east - west);
-        const v = (north - pt.lat) / (north - south);
+        const u = (lons[i] - west) / (east - west);
+        const v = (north - lats[i]) / (north - south);
 
         // Convert to terrain coords
         const x = (u - 0.5) * terrainWidth;
@@ -4,8 +4,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-import base64
 import fal_client
+import pybase64
 from pathlib import Path
 
 print(f"FAL_KEY set: {'FAL_KEY' in os.environ}")
@@ -40,8 +40,12 @@ Style reference: vintage raised relief map with rich, saturated terrain colors""
 def test_stylize():
     # Load and encode image
     print(f"Loading {IMAGE_PATH}...")
+    # Encode in chunks (a multiple of 3 bytes) so the raw file is never fully in memory
+    chunks = []
     with open(IMAGE_PATH, "rb") as f:
-        image_data = base64.b64encode(f.read()).decode("utf-8")
+        while chunk := f.read(57 * 1024):
+            chunks.append(pybase64.b64encode_as_string(chunk))
+    image_data = "".join(chunks)
     
     ext = Path(IMAGE_PATH).suffix.lower()
     mime = "image/png" if ext == ".png" else "image/jpeg"
@@ -0,0 +1,200 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from backend import gpx_parser
+from backend.gpx_parser import parse_gpx, rdp, _stride_indices, _summarize_track
+
+
+GPX_1_1 = "http://www.topografix.com/GPX/1/1"
+GPX_1_0 = "http://www.topografix.com/GPX/1/0"
+
+
+def _write_gpx(tmp_path, body, ns=GPX_1_1):
+    path = tmp_path / "track.gpx"
+    path.write_text(f'<?xml version="1.0"?>\n<gpx xmlns="{ns}" version="1.1">{body}</gpx>')
+    return str(path)
+
+
+def _write_track(tmp_path, lats, lons):
+    trkpts = "".join(f'<trkpt lat="{lat:.7f}" lon="{lon:.7f}"><ele>100</ele></trkpt>' for lat, lon in zip(lats, lons))
+    return _write_gpx(tmp_path, f"<trk><name>Track</name><trkseg>{trkpts}</trkseg></trk>")
+
+
+def test_rdp_collinear_keeps_only_ends():
+    points = np.column_stack([np.linspace(0, 1, 50), np.linspace(0, 2, 50)])
+    assert rdp(points, 1e-9).tolist() == [0, 49]
+
+
+def test_rdp_short_input():
+    assert rdp(np.empty((0, 2)), 0.1).tolist() == []
+    assert rdp(np.array([[0.0, 0.0]]), 0.1).tolist() == [0]
+    assert rdp(np.array([[0.0, 0.0], [1.0, 1.0]]), 0.1).tolist() == [0, 1]
+
+
+def test_rdp_keeps_corner():
+    points = np.array([[0, 0], [1, 0], [2, 0], [2, 1], [2, 2]], dtype=float)
+    assert rdp(points, 0.1).tolist() == [0, 2, 4]
+
+
+def test_rdp_zero_length_span():
+    # A loop that returns to its start: distances fall back to the start point
+    points = np.array([[0, 0], [1, 0], [1, 1], [0, 0]], dtype=float)
+    assert rdp(points, 0.1).tolist() == [0, 1, 2, 3]
+
+    # Stationary points collapse to the ends
+    assert rdp(np.zeros((5, 2)), 0.1).tolist() == [0, 4]
+
+
+def test_rdp_always_keeps_ends():
+    rng = np.random.default_rng(0)
+    points = rng.normal(size=(200, 2))
+    for epsilon in (0.0, 0.5, 100.0):
+        idx = rdp(points, epsilon)
+        assert idx[0] == 0 and idx[-1] == 199
+        assert np.all(np.diff(idx) > 0)
+
+
+def test_rdp_max_gap():
+    points = np.column_stack([np.linspace(0, 10, 101), np.zeros(101)])
+    idx = rdp(points, 1.0, max_gap=1.0)
+    assert idx[0] == 0 and idx[-1] == 100
+    assert np.diff(points[idx, 0]).max() <= 1.0
+
+
+def test_rdp_max_points_stops_early():
+    rng = np.random.default_rng(1)
+    points = rng.normal(size=(500, 2))
+    assert len(rdp(points, 0.0)) == 500
+    assert len(rdp(points, 0.0, max_points=20)) == 21
+
+
+def test_stride_indices_keeps_last():
+    assert _stride_indices(0, 10).tolist() == []
+    assert _stride_indices(1, 10).tolist() == [0]
+    assert _stride_indices(10, 5).tolist() == [0, 5, 9]
+    assert _stride_indices(11, 5).tolist() == [0, 5, 10]
+    for total in range(1, 40):
+        for factor in (1, 2, 3, 7, 50):
+            idx = _stride_indices(total, factor)
+            assert idx[0] == 0 and idx[-1] == total - 1
+            assert np.all(np.diff(idx) > 0)
+
+
+def test_parse_gpx_segments_tracks_and_waypoints(tmp_path):
+    path = _write_gpx(tmp_path, """
+        <metadata><name>Metadata name</name></metadata>
+        <wpt lat="10" lon="10"><ele>9999</ele><name>Spring</name></wpt>
+        <trk>
+            <name>First</name>
+            <trkseg>
+                <trkpt lat="46.0" lon="7.0"><ele>500</ele><time>2024-01-01T00:00:00Z</time></trkpt>
+                <trkpt lat="46.1" lon="7.2"></trkpt>
+            </trkseg>
+            <trkseg>
+                <trkpt lat="45.9" lon="7.1"><ele>800</ele></trkpt>
+            </trkseg>
+        </trk>
+        <trk>
+            <name>Second</name>
+            <trkseg><trkpt lat="46.2" lon="6.9"><ele>300</ele></trkpt></trkseg>
+        </trk>
+        <wpt lat="-10" lon="-10"/>
+    """)
+    data = parse_gpx(path, simplify_factor=1)
+
+    # The track comes back as one list per axis, not a list of point dicts
+    assert set(data) == {
+        "name", "lats", "lons", "eles", "bounds", "elevation_range",
+        "total_points", "simplified_points",
+    }
+    assert len(data["lats"]) == len(data["lons"]) == len(data["eles"]) == data["simplified_points"] == 4
+    assert data["name"] == "First"
+    assert data["total_points"] == 4
+    assert data["bounds"] == {"north": 46.2, "south": 45.9, "east": 7.2, "west": 6.9}
+    # The point without <ele> counts as 0; waypoints are ignored
+    assert data["elevation_range"] == {"min": 0.0, "max": 800.0}
+    assert (data["lats"][0], data["lons"][0], data["eles"][0]) == (46.0, 7.0, 500.0)
+    assert (data["lats"][-1], data["lons"][-1], data["eles"][-1]) == (46.2, 6.9, 300.0)
+
+
+def test_parse_gpx_1_0_namespace(tmp_path):
+    path = _write_gpx(tmp_path, """
+        <trk><name>Old</name><trkseg>
+            <trkpt lat="1.0" lon="2.0"><ele>10</ele></trkpt>
+            <trkpt lat="1.5" lon="2.5"><ele>30</ele></trkpt>
+            <trkpt lat="2.0" lon="3.0"><ele>20</ele></trkpt>
+        </trkseg></trk>
+    """, ns=GPX_1_0)
+    data = parse_gpx(path, simplify_factor=2)
+
+    assert len(data["lats"]) == len(data["lons"]) == len(data["eles"]) == data["simplified_points"]
+    assert data["name"] == "Old"
+    assert data["total_points"] == 3
+    assert data["bounds"] == {"north": 2.0, "south": 1.0, "east": 3.0, "west": 2.0}
+    assert data["elevation_range"] == {"min": 10.0, "max": 30.0}
+    assert (data["lats"][0], data["lons"][0], data["eles"][0]) == (1.0, 2.0, 10.0)
+    assert (data["lats"][-1], data["lons"][-1], data["eles"][-1]) == (2.0, 3.0, 20.0)
+
+
+def test_parse_gpx_empty(tmp_path):
+    path = tmp_path / "empty.gpx"
+    path.write_text(f'<?xml version="1.0"?>\n<gpx xmlns="{GPX_1_1}" version="1.1"/>')
+    data = parse_gpx(str(path))
+
+    assert data["name"] == "Unknown Track"
+    assert data["total_points"] == 0
+    assert data["simplified_points"] == 0
+    assert data["bounds"] == {"north": 0, "south": 0, "east": 0, "west": 0}
+    assert data["elevation_range"] == {"min": 0, "max": 0}
+    assert data["lats"] == data["lons"] == data["eles"] == []
+
+
+def test_summarize_track_rdp_beats_stride_on_clean_track(tmp_path):
+    # A smooth ~10 km arc sampled every ~1.4 m
+    t = np.linspace(0, np.pi / 2, 7200)
+    path = _write_track(tmp_path, 46 + 0.05 * np.sin(t), 7 + 0.07 * (1 - np.cos(t)))
+
+    _, stride, _, total = _summarize_track(path, 20, "stride")
+    _, simplified, _, _ = _summarize_track(path, 20, "rdp")
+
+    assert total == 7200
+    assert len(simplified) < len(stride)
+    np.testing.assert_array_equal(simplified[[0, -1]], stride[[0, -1]])
+
+
+def test_summarize_track_rdp_falls_back_to_stride_on_noise(tmp_path):
+    rng = np.random.default_rng(0)
+    path = _write_track(tmp_path, 46 + rng.uniform(0, 0.01, 2000), 7 + rng.uniform(0, 0.01, 2000))
+
+    _, stride, _, _ = _summarize_track(path, 20, "stride")
+    _, simplified, _, _ = _summarize_track(path, 20, "rdp")
+
+    np.testing.assert_array_equal(simplified, stride)
+
+
+def test_parse_gpx_caches_by_content(tmp_path, monkeypatch):
+    calls = []
+    summarize = gpx_parser._summarize_track
+
+    def counting_summarize(*args):
+        calls.append(args)
+        return summarize(*args)
+
+    monkeypatch.setattr(gpx_parser, "_summarize_track", counting_summarize)
+    monkeypatch.setattr(gpx_parser, "_summary_cache", OrderedDict())
+
+    body = '<trk><name>Cached</name><trkseg><trkpt lat="1" lon="2"/><trkpt lat="3" lon="4"/></trkseg></trk>'
+    first = tmp_path / "a"
+    second = tmp_path / "b"
+    first.mkdir()
+    second.mkdir()
+
+    # Same bytes under a different path (as with repeat uploads) are parsed once
+    assert parse_gpx(_write_gpx(first, body)) == parse_gpx(_write_gpx(second, body))
+    assert len(calls) == 1
+
+    # Different options or content miss
+    parse_gpx(_write_gpx(second, body), simplify_factor=2)
+    parse_gpx(_write_gpx(second, body.replace("Cached", "Changed")))
+    assert len(calls) == 3